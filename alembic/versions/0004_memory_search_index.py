@@ -0,0 +1,81 @@
+"""memory_records search indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+
+Adds the expression indexes used by ``PostgresMemoryStore.search``
+(mirrors ``veritas_os/storage/migrations/sql/0003_memory_records_search_index.sql``):
+
+- ``memory_search_text(value)`` / ``memory_search_tokens(value)``: immutable
+  SQL functions returning the lower-cased searchable text and its tokens.
+- GIN on the token array (token overlap), btree on
+  ``(user_id, length(text))`` (text contained in the query) and, when the
+  ``pg_trgm`` extension can be created, a trigram GIN (query contained in
+  the text).
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION memory_search_text(value JSONB) RETURNS TEXT
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE
+            AS $$
+                SELECT regexp_replace(
+                    lower(COALESCE(NULLIF(value ->> 'text', ''), value ->> 'query', '')),
+                    '^\s+|\s+$', '', 'g'
+                )
+            $$
+        """
+    )
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION memory_search_tokens(value JSONB) RETURNS TEXT[]
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE
+            AS $$
+                SELECT regexp_split_to_array(memory_search_text(value), '\s+')
+            $$
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_memory_records_search_tokens"
+        " ON memory_records USING gin (memory_search_tokens(value))"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_memory_records_search_length"
+        " ON memory_records (user_id, length(memory_search_text(value)))"
+    )
+    # pg_trgm は任意: 権限がない / 未インストールでも検索結果は変わらない
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS ix_memory_records_search_trgm
+                ON memory_records USING gin (memory_search_text(value) gin_trgm_ops);
+        EXCEPTION
+            WHEN insufficient_privilege OR undefined_file OR feature_not_supported THEN
+                RAISE NOTICE 'pg_trgm unavailable; memory substring search is unindexed';
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_memory_records_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_memory_records_search_length")
+    op.execute("DROP INDEX IF EXISTS ix_memory_records_search_tokens")
+    op.execute("DROP FUNCTION IF EXISTS memory_search_tokens(JSONB)")
+    op.execute("DROP FUNCTION IF EXISTS memory_search_text(JSONB)")